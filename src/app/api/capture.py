@@ -0,0 +1,120 @@
+import json
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+CAPTURED_PREFIXES = ("/wallet", "/tx", "/owners")
+# идентификаторы из ответов нужны replay-инструменту для переназначения id
+RESPONSE_ID_KEYS = ("wallet_id", "tx_id")
+
+Exchange = Tuple[str, str, bytes, int, bytes, float, float]
+
+
+class TrafficCaptureWriter:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # файл перезаписывается: смещения t считаются от начала одной сессии захвата
+        self._file = open(path, "w", encoding="utf-8")
+        self._queue: "queue.Queue[Optional[Exchange]]" = queue.Queue()
+        self._started_at: Optional[float] = None
+        self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+        self._thread.start()
+
+    def put(self, exchange: Exchange) -> None:
+        self._queue.put(exchange)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _run(self) -> None:
+        # разбор JSON и запись в файл идут в отдельном потоке, а не в event loop
+        while True:
+            exchange = self._queue.get()
+            if exchange is None:
+                return
+            self._file.write(json.dumps(self._to_record(*exchange), separators=(",", ":")) + "\n")
+            if self._queue.empty():
+                self._file.flush()
+
+    def _to_record(
+        self,
+        method: str,
+        path: str,
+        body: bytes,
+        status: int,
+        response_body: bytes,
+        started: float,
+        duration: float,
+    ) -> Dict[str, Any]:
+        if self._started_at is None:
+            self._started_at = started
+        record: Dict[str, Any] = {
+            "m": method,
+            "p": path,
+            "b": _parse_json(body),
+            "s": status,
+            "d": round(duration * 1000, 3),
+            "t": round(started - self._started_at, 6),
+        }
+        ids = _parse_json(response_body)
+        if isinstance(ids, dict):
+            ids = {key: ids[key] for key in RESPONSE_ID_KEYS if key in ids}
+            if ids:
+                record["r"] = ids
+        return record
+
+
+class TrafficCaptureMiddleware:
+    def __init__(self, app: Any, writer: TrafficCaptureWriter) -> None:
+        self.app = app
+        self.writer = writer
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(CAPTURED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        request_chunks: List[bytes] = []
+        response_chunks: List[bytes] = []
+        response: Dict[str, Any] = {"status": 500}
+
+        async def capture_receive() -> Dict[str, Any]:
+            message = await receive()
+            if message["type"] == "http.request":
+                request_chunks.append(message.get("body", b""))
+            return message
+
+        async def capture_send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response_chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            self.writer.put(
+                (
+                    scope["method"],
+                    scope["path"],
+                    b"".join(request_chunks),
+                    response["status"],
+                    b"".join(response_chunks),
+                    started,
+                    time.perf_counter() - started,
+                )
+            )
+
+
+def _parse_json(raw: bytes) -> Any:
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
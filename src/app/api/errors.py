@@ -0,0 +1,10 @@
+from fastapi import HTTPException
+from src.app.core.errors import MultisigError
+
+
+ERROR_TYPE_HEADER = "X-Multisig-Error"
+
+
+def http_error(exc: MultisigError) -> HTTPException:
+    # тип ошибки в заголовке нужен клиентам и replay-инструменту для разбивки ошибок
+    return HTTPException(status_code=400, detail=str(exc), headers={ERROR_TYPE_HEADER: type(exc).__name__})
@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from src.app.services.wallet_service import wallet_service
+from src.app.models.schemas import WalletIdRequest, AuditVerifyRequest
+from src.app.core.errors import MultisigError
+from src.app.api.errors import http_error
+
+
+router = APIRouter()
+
+
+@router.post("/list")
+def list_audit_records(body: WalletIdRequest) -> dict:
+    try:
+        records = wallet_service.get_audit_records(body.wallet_id)
+        return {"records": records}
+    except MultisigError as exc:
+        raise http_error(exc)
+
+
+@router.post("/verify")
+def verify_audit_log(body: AuditVerifyRequest) -> dict:
+    try:
+        valid = wallet_service.verify_audit_log(body.wallet_id, body.start_seq, body.end_seq)
+        return {"valid": valid}
+    except MultisigError as exc:
+        raise http_error(exc)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from src.app.services.wallet_service import wallet_service
 
 
 router = APIRouter()
@@ -8,3 +9,8 @@ router = APIRouter()
 def healthcheck() -> dict:
     return {"status": "ok"}
 
+
+@router.get("/replication")
+def replication_status() -> dict:
+    return wallet_service.replication_status()
+
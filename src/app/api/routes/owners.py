@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter
 from src.app.services.wallet_service import wallet_service
 from src.app.models.schemas import WalletIdRequest
 from src.app.core.errors import MultisigError
+from src.app.api.errors import http_error
 
 
 router = APIRouter()
@@ -13,5 +14,5 @@ def list_owners(body: WalletIdRequest) -> dict:
         owners = wallet_service.get_owners(body.wallet_id)
         return {"owners": owners}
     except MultisigError as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
+        raise http_error(exc)
 
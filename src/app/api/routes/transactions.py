@@ -1,12 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter
 from src.app.services.wallet_service import wallet_service
 from src.app.models.schemas import (
     SubmitTxRequest,
     ConfirmTxRequest,
     ExecuteTxRequest,
+    GetTxRequest,
     TxResponse,
 )
 from src.app.core.errors import MultisigError
+from src.app.api.errors import http_error
 
 
 router = APIRouter()
@@ -22,7 +24,16 @@ def submit_tx(body: SubmitTxRequest) -> TxResponse:
         )
         return TxResponse(**tx)
     except MultisigError as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
+        raise http_error(exc)
+
+
+@router.post("/get", response_model=TxResponse)
+def get_tx(body: GetTxRequest) -> TxResponse:
+    try:
+        tx = wallet_service.get_transaction(wallet_id=body.wallet_id, tx_id=body.tx_id)
+        return TxResponse(**tx)
+    except MultisigError as exc:
+        raise http_error(exc)
 
 
 @router.post("/confirm")
@@ -33,7 +44,7 @@ def confirm_tx(body: ConfirmTxRequest) -> dict:
         )
         return {"status": "confirmed"}
     except MultisigError as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
+        raise http_error(exc)
 
 
 @router.post("/execute")
@@ -44,5 +55,5 @@ def execute_tx(body: ExecuteTxRequest) -> dict:
         )
         return {"status": "executed", "result": result}
     except MultisigError as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
+        raise http_error(exc)
 
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter
 from src.app.services.wallet_service import wallet_service
 from src.app.models.schemas import WalletCreateRequest, WalletResponse, PauseRequest, ReplaceOwnerRequest
 from src.app.core.errors import MultisigError
+from src.app.api.errors import http_error
 
 
 router = APIRouter()
@@ -14,10 +15,11 @@ def create_wallet(body: WalletCreateRequest) -> WalletResponse:
             owners=body.owners,
             threshold=body.threshold,
             timelock_seconds=body.timelock_seconds or 0,
+            expiry_seconds=body.expiry_seconds or 0,
         )
         return WalletResponse(**wallet)
     except MultisigError as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
+        raise http_error(exc)
 
 
 @router.post("/pause")
@@ -26,7 +28,7 @@ def pause_wallet(body: PauseRequest) -> dict:
         wallet_service.pause(body.wallet_id)
         return {"status": "paused"}
     except MultisigError as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
+        raise http_error(exc)
 
 
 @router.post("/unpause")
@@ -35,7 +37,7 @@ def unpause_wallet(body: PauseRequest) -> dict:
         wallet_service.unpause(body.wallet_id)
         return {"status": "unpaused"}
     except MultisigError as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
+        raise http_error(exc)
 
 
 @router.post("/replace-owner")
@@ -44,5 +46,5 @@ def replace_owner(body: ReplaceOwnerRequest) -> dict:
         wallet_service.replace_owner(body.wallet_id, body.old_owner, body.new_owner)
         return {"status": "owner_replaced"}
     except MultisigError as exc:
-        raise HTTPException(status_code=400, detail=str(exc))
+        raise http_error(exc)
 
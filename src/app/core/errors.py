@@ -33,3 +33,19 @@ class TimelockNotElapsedError(MultisigError):
 class InvalidOperationError(MultisigError):
     pass
 
+
+class TransactionExpiredError(MultisigError):
+    pass
+
+
+class ReadOnlyReplicaError(MultisigError):
+    pass
+
+
+class ReplicaLagError(MultisigError):
+    pass
+
+
+class AuditLogUnavailableError(MultisigError):
+    pass
+
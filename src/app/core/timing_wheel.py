@@ -0,0 +1,58 @@
+import math
+import threading
+from typing import Any, List, Optional, Tuple
+
+
+# Хешированное колесо таймеров: O(1) на постановку, амортизированно O(1) на срабатывание.
+class TimingWheel:
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 512) -> None:
+        if tick_seconds <= 0:
+            raise ValueError("tick_seconds must be positive")
+        if slots < 1:
+            raise ValueError("slots must be positive")
+        self.tick_seconds = tick_seconds
+        self._slots: List[List[Tuple[int, Any]]] = [[] for _ in range(slots)]
+        self._current_tick: Optional[int] = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def schedule(self, deadline: float, item: Any, now: float) -> None:
+        with self._lock:
+            if self._current_tick is None:
+                self._current_tick = int(now // self.tick_seconds)
+            # округляем вверх, чтобы элемент никогда не срабатывал раньше срока
+            tick = max(math.ceil(deadline / self.tick_seconds), self._current_tick + 1)
+            self._slots[tick % len(self._slots)].append((tick, item))
+            self._size += 1
+
+    def advance(self, now: float) -> List[Any]:
+        with self._lock:
+            return self._advance(int(now // self.tick_seconds))
+
+    def _advance(self, target: int) -> List[Any]:
+        if self._current_tick is None:
+            self._current_tick = target
+            return []
+        if target <= self._current_tick:
+            return []
+        fired: List[Any] = []
+        # за один вызов каждый слот просматривается не более одного раза
+        steps = min(target - self._current_tick, len(self._slots))
+        for tick in range(self._current_tick + 1, self._current_tick + steps + 1):
+            index = tick % len(self._slots)
+            bucket = self._slots[index]
+            if not bucket:
+                continue
+            pending = []
+            for entry in bucket:
+                if entry[0] <= target:
+                    fired.append(entry[1])
+                else:
+                    pending.append(entry)
+            self._slots[index] = pending
+        self._current_tick = target
+        self._size -= len(fired)
+        return fired
@@ -14,6 +14,7 @@ class Transaction:
     submitted_at: float
     confirmations: Set[str] = field(default_factory=set)
     executed: bool = False
+    expires_at: Optional[float] = None
 
 
 @dataclass
@@ -22,6 +23,7 @@ class Wallet:
     owners: Set[str]
     threshold: int
     timelock_seconds: int = 0
+    expiry_seconds: int = 0
     paused: bool = False
     transactions: Dict[TxId, Transaction] = field(default_factory=dict)
 
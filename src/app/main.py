@@ -1,16 +1,65 @@
+import os
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from src.app.api.routes.health import router as health_router
 from src.app.api.routes.wallet import router as wallet_router
 from src.app.api.routes.transactions import router as tx_router
 from src.app.api.routes.owners import router as owners_router
+from src.app.api.routes.audit import router as audit_router
+from src.app.api.capture import TrafficCaptureMiddleware, TrafficCaptureWriter
+from src.app.services.wallet_service import wallet_service
+from src.app.storage.memory import storage
+from src.app.storage.replication import ReplicationServer, ReplicationFollower, mutation_log
+
+
+@asynccontextmanager
+async def app_lifespan(app: FastAPI):
+    # MULTISIG_ROLE=primary|follower, MULTISIG_REPLICATION_SOCKET=путь к Unix-сокету
+    role = os.environ.get("MULTISIG_ROLE", "primary")
+    socket_path = os.environ.get("MULTISIG_REPLICATION_SOCKET")
+    server = None
+    follower = None
+    sweeper_stop = threading.Event()
+    if socket_path and role == "primary":
+        server = ReplicationServer(socket_path, mutation_log, wallet_service.replication_snapshot)
+        server.start()
+    elif socket_path and role == "follower":
+        follower = ReplicationFollower(
+            socket_path,
+            storage,
+            max_lag_seconds=float(os.environ.get("MULTISIG_REPLICA_MAX_LAG", "5")),
+        )
+        wallet_service.attach_replica(follower)
+        follower.start()
+    if follower is None:
+        # follower получает expire из лога primary и сам транзакции не убирает
+        threading.Thread(
+            target=wallet_service.run_sweeper, args=(sweeper_stop,), name="expiry-sweeper", daemon=True
+        ).start()
+    yield
+    sweeper_stop.set()
+    if server is not None:
+        server.stop()
+    if follower is not None:
+        follower.stop()
+        wallet_service.attach_replica(None)
+    capture = getattr(app.state, "traffic_capture", None)
+    if capture is not None:
+        capture.close()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Multisig Wallet API", version="0.1.0")
+    app = FastAPI(title="Multisig Wallet API", version="0.1.0", lifespan=app_lifespan)
     app.include_router(health_router, prefix="/health", tags=["health"])
     app.include_router(wallet_router, prefix="/wallet", tags=["wallet"])
     app.include_router(tx_router, prefix="/tx", tags=["transactions"])
     app.include_router(owners_router, prefix="/owners", tags=["owners"])
+    app.include_router(audit_router, prefix="/audit", tags=["audit"])
+    capture_path = os.environ.get("MULTISIG_CAPTURE_FILE")
+    if capture_path:
+        app.state.traffic_capture = TrafficCaptureWriter(capture_path)
+        app.add_middleware(TrafficCaptureMiddleware, writer=app.state.traffic_capture)
     return app
 
 
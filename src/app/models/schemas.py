@@ -6,6 +6,7 @@ class WalletCreateRequest(BaseModel):
     owners: List[str] = Field(..., min_length=1)
     threshold: int = Field(..., ge=1)
     timelock_seconds: Optional[int] = Field(default=0, ge=0)
+    expiry_seconds: Optional[int] = Field(default=0, ge=0)
 
 
 class WalletResponse(BaseModel):
@@ -14,6 +15,7 @@ class WalletResponse(BaseModel):
     owners: List[str]
     threshold: int
     timelock_seconds: int
+    expiry_seconds: int
     paused: bool
 
 
@@ -31,6 +33,12 @@ class WalletIdRequest(BaseModel):
     wallet_id: str
 
 
+class AuditVerifyRequest(BaseModel):
+    wallet_id: str
+    start_seq: Optional[int] = Field(default=None, ge=0)
+    end_seq: Optional[int] = Field(default=None, ge=0)
+
+
 class SubmitTxRequest(BaseModel):
     wallet_id: str
     creator: str
@@ -48,6 +56,11 @@ class ExecuteTxRequest(BaseModel):
     tx_id: str
 
 
+class GetTxRequest(BaseModel):
+    wallet_id: str
+    tx_id: str
+
+
 class TxResponse(BaseModel):
     tx_id: str
     creator: str
@@ -55,4 +68,5 @@ class TxResponse(BaseModel):
     submitted_at: float
     confirmations: List[str]
     executed: bool
+    expires_at: Optional[float] = None
 
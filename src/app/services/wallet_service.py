@@ -1,6 +1,8 @@
+import threading
 import uuid
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from src.app.core.types import Wallet, Transaction
+from src.app.core.timing_wheel import TimingWheel
 from src.app.core.errors import (
     WalletNotFoundError,
     NotAnOwnerError,
@@ -9,102 +11,263 @@ from src.app.core.errors import (
     WalletPausedError,
     TimelockNotElapsedError,
     InvalidOperationError,
+    TransactionExpiredError,
+    ReadOnlyReplicaError,
+    ReplicaLagError,
 )
 from src.app.storage.memory import storage
+from src.app.storage.audit import audit_log
+from src.app.storage.replication import ReplicationFollower, mutation_log, snapshot_storage
 from src.app.core.security import current_timestamp
 
 
 class WalletService:
-    def create_wallet(self, owners: List[str], threshold: int, timelock_seconds: int) -> Dict[str, Any]:
-        unique_owners = set(owners)
-        if threshold > len(unique_owners):
-            raise InvalidOperationError("threshold cannot exceed number of owners")
-        wallet_id = str(uuid.uuid4())
-        wallet = Wallet(
-            wallet_id=wallet_id,
-            owners=unique_owners,
-            threshold=threshold,
-            timelock_seconds=timelock_seconds,
-        )
-        storage.put_wallet(wallet)
-        return {
-            "wallet_id": wallet.wallet_id,
-            "owners": sorted(wallet.owners),
-            "threshold": wallet.threshold,
-            "timelock_seconds": wallet.timelock_seconds,
-            "paused": wallet.paused,
-        }
+    def __init__(self) -> None:
+        self._expiry_wheel = TimingWheel()
+        self._lock = threading.RLock()
+        self._replica: Optional[ReplicationFollower] = None
+
+    def attach_replica(self, replica: Optional[ReplicationFollower]) -> None:
+        self._replica = replica
+
+    def replication_status(self) -> Dict[str, Any]:
+        if self._replica is None:
+            return {"role": "primary", "lsn": mutation_log.head_lsn}
+        return {"role": "follower", **self._replica.status()}
+
+    def replication_snapshot(self) -> Tuple[str, int, Dict[str, Any]]:
+        # мутация и запись в лог атомарны под self._lock, поэтому снимок соответствует lsn
+        with self._lock:
+            return mutation_log.epoch, mutation_log.head_lsn, snapshot_storage(storage)
+
+    def create_wallet(
+        self, owners: List[str], threshold: int, timelock_seconds: int, expiry_seconds: int = 0
+    ) -> Dict[str, Any]:
+        self._ensure_primary()
+        with self._lock:
+            self.sweep_expired(current_timestamp())
+            unique_owners = set(owners)
+            if threshold > len(unique_owners):
+                raise InvalidOperationError("threshold cannot exceed number of owners")
+            if 0 < expiry_seconds <= timelock_seconds:
+                raise InvalidOperationError("expiry must exceed timelock")
+            wallet_id = str(uuid.uuid4())
+            wallet = Wallet(
+                wallet_id=wallet_id,
+                owners=unique_owners,
+                threshold=threshold,
+                timelock_seconds=timelock_seconds,
+                expiry_seconds=expiry_seconds,
+            )
+            storage.put_wallet(wallet)
+            self._record(
+                wallet_id,
+                "create_wallet",
+                actor=None,
+                data={
+                    "owners": sorted(wallet.owners),
+                    "threshold": threshold,
+                    "timelock_seconds": timelock_seconds,
+                    "expiry_seconds": expiry_seconds,
+                },
+            )
+            return {
+                "wallet_id": wallet.wallet_id,
+                "owners": sorted(wallet.owners),
+                "threshold": wallet.threshold,
+                "timelock_seconds": wallet.timelock_seconds,
+                "expiry_seconds": wallet.expiry_seconds,
+                "paused": wallet.paused,
+            }
 
     def _get_wallet(self, wallet_id: str) -> Wallet:
-        if not storage.has_wallet(wallet_id):
+        # одно обращение к хранилищу: на follower словарь кошельков может быть подменён снимком
+        wallet = storage.find_wallet(wallet_id)
+        if wallet is None:
             raise WalletNotFoundError("wallet not found")
-        return storage.get_wallet(wallet_id)
+        return wallet
 
     def pause(self, wallet_id: str) -> None:
-        wallet = self._get_wallet(wallet_id)
-        wallet.paused = True
+        self._ensure_primary()
+        with self._lock:
+            self.sweep_expired(current_timestamp())
+            wallet = self._get_wallet(wallet_id)
+            wallet.paused = True
+            self._record(wallet_id, "pause", actor=None, data={})
 
     def unpause(self, wallet_id: str) -> None:
-        wallet = self._get_wallet(wallet_id)
-        wallet.paused = False
+        self._ensure_primary()
+        with self._lock:
+            self.sweep_expired(current_timestamp())
+            wallet = self._get_wallet(wallet_id)
+            wallet.paused = False
+            self._record(wallet_id, "unpause", actor=None, data={})
 
     def replace_owner(self, wallet_id: str, old_owner: str, new_owner: str) -> None:
-        wallet = self._get_wallet(wallet_id)
-        if old_owner not in wallet.owners:
-            raise NotAnOwnerError("old owner is not in wallet")
-        wallet.owners.remove(old_owner)
-        wallet.owners.add(new_owner)
+        self._ensure_primary()
+        with self._lock:
+            self.sweep_expired(current_timestamp())
+            wallet = self._get_wallet(wallet_id)
+            if old_owner not in wallet.owners:
+                raise NotAnOwnerError("old owner is not in wallet")
+            wallet.owners.remove(old_owner)
+            wallet.owners.add(new_owner)
+            self._record(
+                wallet_id, "replace_owner", actor=None, data={"old_owner": old_owner, "new_owner": new_owner}
+            )
 
     def get_owners(self, wallet_id: str) -> List[str]:
+        self._ensure_fresh()
+        self.sweep_expired(current_timestamp())
         wallet = self._get_wallet(wallet_id)
         return sorted(wallet.owners)
 
-    def submit_transaction(self, wallet_id: str, creator: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def get_transaction(self, wallet_id: str, tx_id: str) -> Dict[str, Any]:
+        self._ensure_fresh()
+        self.sweep_expired(current_timestamp())
         wallet = self._get_wallet(wallet_id)
-        if creator not in wallet.owners:
-            raise NotAnOwnerError("creator is not an owner")
-        tx_id = str(uuid.uuid4())
-        tx = Transaction(
-            tx_id=tx_id,
-            creator=creator,
-            payload=payload,
-            submitted_at=current_timestamp(),
-        )
-        tx.confirmations.add(creator)  # авто-подтверждение инициатора по желанию
-        wallet.transactions[tx_id] = tx
-        return self._tx_to_dict(tx)
+        return self._tx_to_dict(self._get_tx(wallet, tx_id))
+
+    def submit_transaction(self, wallet_id: str, creator: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self._ensure_primary()
+        with self._lock:
+            wallet = self._get_wallet(wallet_id)
+            if creator not in wallet.owners:
+                raise NotAnOwnerError("creator is not an owner")
+            now = current_timestamp()
+            self.sweep_expired(now)
+            tx_id = str(uuid.uuid4())
+            tx = Transaction(
+                tx_id=tx_id,
+                creator=creator,
+                payload=payload,
+                submitted_at=now,
+            )
+            if wallet.expiry_seconds > 0:
+                tx.expires_at = now + wallet.expiry_seconds
+                self._expiry_wheel.schedule(tx.expires_at, (wallet_id, tx_id), now)
+            tx.confirmations.add(creator)  # авто-подтверждение инициатора по желанию
+            wallet.transactions[tx_id] = tx
+            self._record(
+                wallet_id,
+                "submit",
+                actor=creator,
+                data={"tx_id": tx_id, "payload": payload, "submitted_at": now, "expires_at": tx.expires_at},
+            )
+            return self._tx_to_dict(tx)
 
     def confirm_transaction(self, wallet_id: str, tx_id: str, owner: str) -> None:
-        wallet = self._get_wallet(wallet_id)
-        if owner not in wallet.owners:
-            raise NotAnOwnerError("not an owner")
-        if tx_id not in wallet.transactions:
-            raise InvalidOperationError("transaction not found")
-        tx = wallet.transactions[tx_id]
-        if owner in tx.confirmations:
-            raise AlreadyConfirmedError("already confirmed")
-        if tx.executed:
-            raise InvalidOperationError("already executed")
-        tx.confirmations.add(owner)
+        self._ensure_primary()
+        with self._lock:
+            now = current_timestamp()
+            self.sweep_expired(now)
+            wallet = self._get_wallet(wallet_id)
+            if owner not in wallet.owners:
+                raise NotAnOwnerError("not an owner")
+            tx = self._get_tx(wallet, tx_id)
+            if owner in tx.confirmations:
+                raise AlreadyConfirmedError("already confirmed")
+            if tx.executed:
+                raise InvalidOperationError("already executed")
+            if self._is_expired(tx, now):
+                raise TransactionExpiredError("transaction expired")
+            tx.confirmations.add(owner)
+            self._record(wallet_id, "confirm", actor=owner, data={"tx_id": tx_id})
 
     def execute_transaction(self, wallet_id: str, tx_id: str) -> Dict[str, Any]:
-        wallet = self._get_wallet(wallet_id)
-        if wallet.paused:
-            raise WalletPausedError("wallet paused")
-        if tx_id not in wallet.transactions:
-            raise InvalidOperationError("transaction not found")
-        tx = wallet.transactions[tx_id]
-        if tx.executed:
-            raise InvalidOperationError("already executed")
-        if len(tx.confirmations) < wallet.threshold:
-            raise ThresholdNotMetError("confirmations below threshold")
-        # timelock
-        now = current_timestamp()
-        if wallet.timelock_seconds > 0 and now - tx.submitted_at < wallet.timelock_seconds:
-            raise TimelockNotElapsedError("timelock not elapsed")
-        tx.executed = True
-        # Здесь можно интегрировать фактическое действие. Возвращаем payload как результат.
-        return {"payload": tx.payload, "executed_at": now}
+        self._ensure_primary()
+        with self._lock:
+            now = current_timestamp()
+            self.sweep_expired(now)
+            wallet = self._get_wallet(wallet_id)
+            if wallet.paused:
+                raise WalletPausedError("wallet paused")
+            tx = self._get_tx(wallet, tx_id)
+            if tx.executed:
+                raise InvalidOperationError("already executed")
+            if self._is_expired(tx, now):
+                raise TransactionExpiredError("transaction expired")
+            if len(tx.confirmations) < wallet.threshold:
+                raise ThresholdNotMetError("confirmations below threshold")
+            # timelock
+            if wallet.timelock_seconds > 0 and now - tx.submitted_at < wallet.timelock_seconds:
+                raise TimelockNotElapsedError("timelock not elapsed")
+            tx.executed = True
+            self._record(wallet_id, "execute", actor=None, data={"tx_id": tx_id, "executed_at": now})
+            # Здесь можно интегрировать фактическое действие. Возвращаем payload как результат.
+            return {"payload": tx.payload, "executed_at": now}
+
+    def sweep_expired(self, now: float) -> int:
+        # колесо продвигается из каждого вызова сервиса и из фонового sweeper, пока тик не сменился это O(1)
+        fired = self._expiry_wheel.advance(now)
+        if not fired:
+            return 0
+        removed = 0
+        with self._lock:
+            for wallet_id, tx_id in fired:
+                if not storage.has_wallet(wallet_id):
+                    continue
+                wallet = storage.get_wallet(wallet_id)
+                tx = wallet.transactions.get(tx_id)
+                # выполненные транзакции остаются в истории, отменять таймер не нужно
+                if tx is None or tx.executed:
+                    continue
+                del wallet.transactions[tx_id]
+                storage.mark_expired(wallet_id, tx_id)
+                self._record(wallet_id, "expire", actor=None, data={"tx_id": tx_id})
+                removed += 1
+        return removed
+
+    def run_sweeper(self, stop: threading.Event, interval_seconds: float = 1.0) -> None:
+        while not stop.wait(interval_seconds):
+            self.sweep_expired(current_timestamp())
+
+    def get_audit_records(self, wallet_id: str) -> List[Dict[str, Any]]:
+        # журнал аудита ведётся только на primary
+        self._ensure_primary()
+        self._get_wallet(wallet_id)
+        return [
+            {
+                "seq": r.seq,
+                "action": r.action,
+                "actor": r.actor,
+                "data": r.data,
+                "timestamp": r.timestamp,
+                "prev_hash": r.prev_hash,
+                "hash": r.hash,
+            }
+            for r in audit_log.get_records(wallet_id)
+        ]
+
+    def verify_audit_log(
+        self, wallet_id: str, start_seq: Optional[int] = None, end_seq: Optional[int] = None
+    ) -> bool:
+        self._ensure_primary()
+        self._get_wallet(wallet_id)
+        return audit_log.verify(wallet_id, start_seq, end_seq)
+
+    def _record(self, wallet_id: str, action: str, actor: Optional[str], data: Dict[str, Any]) -> None:
+        # вызывается под self._lock вместе с мутацией, иначе порядок в логе может разойтись с состоянием
+        audit_log.append(wallet_id, action, actor=actor, data=data)
+        mutation_log.append(wallet_id, action, actor=actor, data=data)
+
+    def _ensure_primary(self) -> None:
+        if self._replica is not None:
+            raise ReadOnlyReplicaError("replica is read-only, send writes to primary")
+
+    def _ensure_fresh(self) -> None:
+        if self._replica is not None and not self._replica.is_fresh():
+            raise ReplicaLagError("replica lag exceeds bound")
+
+    def _get_tx(self, wallet: Wallet, tx_id: str) -> Transaction:
+        if tx_id in wallet.transactions:
+            return wallet.transactions[tx_id]
+        if storage.is_expired(wallet.wallet_id, tx_id):
+            raise TransactionExpiredError("transaction expired")
+        raise InvalidOperationError("transaction not found")
+
+    def _is_expired(self, tx: Transaction, now: float) -> bool:
+        return tx.expires_at is not None and now >= tx.expires_at
 
     def _tx_to_dict(self, tx: Transaction) -> Dict[str, Any]:
         return {
@@ -114,6 +277,7 @@ class WalletService:
             "submitted_at": tx.submitted_at,
             "confirmations": sorted(list(tx.confirmations)),
             "executed": tx.executed,
+            "expires_at": tx.expires_at,
         }
 
 
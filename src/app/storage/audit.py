@@ -0,0 +1,213 @@
+import hashlib
+import json
+import logging
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from src.app.core.types import WalletId
+from src.app.core.security import current_timestamp
+from src.app.core.errors import AuditLogUnavailableError
+
+
+logger = logging.getLogger(__name__)
+
+
+GENESIS_HASH = "0" * 64
+
+
+@dataclass
+class AuditRecord:
+    wallet_id: WalletId
+    seq: int
+    action: str
+    actor: Optional[str]
+    data: Dict[str, Any]
+    timestamp: float
+    prev_hash: str
+    hash: str
+
+
+@dataclass
+class AuditCheckpoint:
+    start_seq: int
+    end_seq: int
+    merkle_root: str
+    head_hash: str
+    # уровни дерева Меркла (листья первыми) для проверки диапазона без пересчёта всего сегмента
+    tree: List[List[str]] = field(default_factory=list, repr=False)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def record_hash(record: AuditRecord) -> str:
+    body = {
+        "wallet_id": record.wallet_id,
+        "seq": record.seq,
+        "action": record.action,
+        "actor": record.actor,
+        "data": record.data,
+        "timestamp": record.timestamp,
+        "prev_hash": record.prev_hash,
+    }
+    return _sha256(json.dumps(body, sort_keys=True, default=str).encode("utf-8"))
+
+
+def _parent_hash(level: List[str], left: int) -> str:
+    right = left + 1 if left + 1 < len(level) else left
+    return _sha256((level[left] + level[right]).encode("ascii"))
+
+
+def merkle_tree(hashes: List[str]) -> List[List[str]]:
+    levels = [list(hashes)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([_parent_hash(level, i) for i in range(0, len(level), 2)])
+    return levels
+
+
+def merkle_root(hashes: List[str]) -> str:
+    if not hashes:
+        return GENESIS_HASH
+    return merkle_tree(hashes)[-1][0]
+
+
+class AuditLog:
+    def __init__(self, checkpoint_interval: int = 64, flush_timeout: float = 5.0) -> None:
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be positive")
+        self.checkpoint_interval = checkpoint_interval
+        self.flush_timeout = flush_timeout
+        self.failed_writes = 0
+        self.records: Dict[WalletId, List[AuditRecord]] = {}
+        self.checkpoints: Dict[WalletId, List[AuditCheckpoint]] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+    def append(self, wallet_id: WalletId, action: str, actor: Optional[str], data: Dict[str, Any]) -> None:
+        # на пути запроса только постановка в очередь; хеширование делает фоновый писатель
+        self._ensure_writer()
+        self._queue.put((wallet_id, action, actor, dict(data), current_timestamp()))
+
+    def flush(self) -> None:
+        # ждём только записи, поставленные до вызова, а не опустошения очереди
+        marker = threading.Event()
+        self._ensure_writer()
+        self._queue.put(marker)
+        if not marker.wait(self.flush_timeout):
+            raise AuditLogUnavailableError("audit log writer is not responding")
+
+    def get_records(self, wallet_id: WalletId) -> List[AuditRecord]:
+        self.flush()
+        with self._lock:
+            return list(self.records.get(wallet_id, []))
+
+    def verify(self, wallet_id: WalletId, start_seq: Optional[int] = None, end_seq: Optional[int] = None) -> bool:
+        self.flush()
+        with self._lock:
+            records = self.records.get(wallet_id, [])
+            checkpoints = self.checkpoints.get(wallet_id, [])
+            end = len(records) if end_seq is None else min(end_seq, len(records))
+            if start_seq is None:
+                # по умолчанию проверяется только хвост после последнего чекпоинта
+                start = checkpoints[-1].end_seq if checkpoints else 0
+            else:
+                start = max(start_seq, 0)
+            if start >= end:
+                return True
+            # внутри чекпоинтов пересчитываются только записи диапазона и путь до корня Меркла
+            for cp in checkpoints:
+                lo, hi = max(start, cp.start_seq), min(end, cp.end_seq)
+                if lo < hi and not self._verify_checkpoint_range(records, cp, lo, hi):
+                    return False
+            # хвост после последнего чекпоинта привязан к сохранённому head_hash, а не к изменяемой записи
+            tail_start = checkpoints[-1].end_seq if checkpoints else 0
+            anchor = checkpoints[-1].head_hash if checkpoints else GENESIS_HASH
+            if tail_start < end and not self._verify_chain(records, tail_start, end, anchor):
+                return False
+            return True
+
+    def _verify_checkpoint_range(
+        self, records: List[AuditRecord], checkpoint: AuditCheckpoint, start: int, end: int
+    ) -> bool:
+        nodes: Dict[int, str] = {}
+        for seq in range(start, end):
+            computed = record_hash(records[seq])
+            if computed != records[seq].hash:
+                return False
+            nodes[seq - checkpoint.start_seq] = computed
+        # соседние узлы берутся из дерева чекпоинта: O(диапазон + log n) хешей вместо всего сегмента
+        for level in checkpoint.tree[:-1]:
+            parents: Dict[int, str] = {}
+            for index in nodes:
+                left = index - index % 2
+                right = left + 1 if left + 1 < len(level) else left
+                pair = nodes.get(left, level[left]) + nodes.get(right, level[right])
+                parents[left // 2] = _sha256(pair.encode("ascii"))
+            nodes = parents
+        return nodes.get(0) == checkpoint.merkle_root
+
+    def _verify_chain(self, records: List[AuditRecord], start: int, end: int, prev_hash: str) -> bool:
+        for record in records[start:end]:
+            if record.prev_hash != prev_hash or record_hash(record) != record.hash:
+                return False
+            prev_hash = record.hash
+        return True
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run_writer, name="audit-writer", daemon=True)
+                self._writer.start()
+
+    def _run_writer(self) -> None:
+        while True:
+            item = self._queue.get()
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            # сбой одной записи не должен останавливать писателя, иначе flush() зависнет
+            try:
+                self._write(*item)
+            except Exception:
+                self.failed_writes += 1
+                logger.exception("failed to append audit record for wallet %s", item[0])
+
+    def _write(
+        self, wallet_id: WalletId, action: str, actor: Optional[str], data: Dict[str, Any], timestamp: float
+    ) -> None:
+        with self._lock:
+            chain = self.records.setdefault(wallet_id, [])
+            record = AuditRecord(
+                wallet_id=wallet_id,
+                seq=len(chain),
+                action=action,
+                actor=actor,
+                data=data,
+                timestamp=timestamp,
+                prev_hash=chain[-1].hash if chain else GENESIS_HASH,
+                hash="",
+            )
+            record.hash = record_hash(record)
+            chain.append(record)
+            if len(chain) % self.checkpoint_interval == 0:
+                start = len(chain) - self.checkpoint_interval
+                tree = merkle_tree([r.hash for r in chain[start:]])
+                self.checkpoints.setdefault(wallet_id, []).append(
+                    AuditCheckpoint(
+                        start_seq=start,
+                        end_seq=len(chain),
+                        merkle_root=tree[-1][0],
+                        head_hash=record.hash,
+                        tree=tree,
+                    )
+                )
+
+
+audit_log = AuditLog()
@@ -1,10 +1,14 @@
-from typing import Dict
-from src.app.core.types import Wallet, WalletId
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from src.app.core.types import Wallet, WalletId, TxId
 
 
 class InMemoryStorage:
-    def __init__(self) -> None:
+    def __init__(self, max_expired: int = 10000) -> None:
         self.wallets: Dict[WalletId, Wallet] = {}
+        # ограниченный набор id просроченных транзакций, чтобы ошибка оставалась TransactionExpiredError
+        self.expired: "OrderedDict[Tuple[WalletId, TxId], None]" = OrderedDict()
+        self.max_expired = max_expired
 
     def put_wallet(self, wallet: Wallet) -> None:
         self.wallets[wallet.wallet_id] = wallet
@@ -15,6 +19,22 @@ class InMemoryStorage:
     def has_wallet(self, wallet_id: WalletId) -> bool:
         return wallet_id in self.wallets
 
+    def find_wallet(self, wallet_id: WalletId) -> Optional[Wallet]:
+        return self.wallets.get(wallet_id)
+
+    def replace_with(self, other: "InMemoryStorage") -> None:
+        # подмена ссылок атомарна для читателей, в отличие от clear() и повторного заполнения
+        self.wallets = other.wallets
+        self.expired = other.expired
+
+    def mark_expired(self, wallet_id: WalletId, tx_id: TxId) -> None:
+        self.expired[(wallet_id, tx_id)] = None
+        if len(self.expired) > self.max_expired:
+            self.expired.popitem(last=False)
+
+    def is_expired(self, wallet_id: WalletId, tx_id: TxId) -> bool:
+        return (wallet_id, tx_id) in self.expired
+
 
 storage = InMemoryStorage()
 
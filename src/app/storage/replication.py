@@ -0,0 +1,335 @@
+import json
+import os
+import socket
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.app.core.types import Wallet, Transaction, WalletId
+from src.app.core.security import current_timestamp
+from src.app.storage.memory import InMemoryStorage
+
+
+Snapshot = Tuple[str, int, Dict[str, Any]]
+
+
+class MutationLog:
+    def __init__(self, retention: int = 10000) -> None:
+        if retention < 1:
+            raise ValueError("retention must be positive")
+        self.enabled = False
+        self.retention = retention
+        self.epoch = uuid.uuid4().hex
+        self.entries: List[Dict[str, Any]] = []
+        self.first_lsn = 1
+        self._cond = threading.Condition()
+
+    @property
+    def head_lsn(self) -> int:
+        return self.first_lsn + len(self.entries) - 1
+
+    def start_epoch(self) -> None:
+        # новая эпоха: follower с другой эпохой или отставший за retention получает снимок
+        with self._cond:
+            self.epoch = uuid.uuid4().hex
+            self.entries = []
+            self.first_lsn = 1
+            self.enabled = True
+            self._cond.notify_all()
+
+    def append(self, wallet_id: WalletId, action: str, actor: Optional[str], data: Dict[str, Any]) -> None:
+        # лог ведётся только на primary, пока его раздаёт ReplicationServer
+        if not self.enabled:
+            return
+        with self._cond:
+            self.entries.append(
+                {
+                    "lsn": self.head_lsn + 1,
+                    "ts": current_timestamp(),
+                    "wallet_id": wallet_id,
+                    "action": action,
+                    "actor": actor,
+                    "data": data,
+                }
+            )
+            # усечение пачками по retention записей, амортизированно O(1) на append
+            if len(self.entries) >= 2 * self.retention:
+                del self.entries[: self.retention]
+                self.first_lsn += self.retention
+            self._cond.notify_all()
+
+    def read_from(self, lsn: int, timeout: float) -> Optional[List[Dict[str, Any]]]:
+        with self._cond:
+            if self.head_lsn < lsn:
+                self._cond.wait(timeout)
+            if lsn < self.first_lsn:
+                return None
+            return self.entries[lsn - self.first_lsn:]
+
+    def head(self) -> Tuple[int, float]:
+        # голова лога и время читаются вместе, чтобы heartbeat не отставал от append
+        with self._cond:
+            return self.head_lsn, current_timestamp()
+
+
+def snapshot_storage(store: InMemoryStorage) -> Dict[str, Any]:
+    return {
+        "wallets": [
+            {
+                "wallet_id": wallet.wallet_id,
+                "owners": sorted(wallet.owners),
+                "threshold": wallet.threshold,
+                "timelock_seconds": wallet.timelock_seconds,
+                "expiry_seconds": wallet.expiry_seconds,
+                "paused": wallet.paused,
+                "transactions": [
+                    {
+                        "tx_id": tx.tx_id,
+                        "creator": tx.creator,
+                        "payload": tx.payload,
+                        "submitted_at": tx.submitted_at,
+                        "confirmations": sorted(tx.confirmations),
+                        "executed": tx.executed,
+                        "expires_at": tx.expires_at,
+                    }
+                    for tx in wallet.transactions.values()
+                ],
+            }
+            for wallet in store.wallets.values()
+        ],
+        "expired": [list(key) for key in store.expired],
+    }
+
+
+def restore_storage(store: InMemoryStorage, snapshot: Dict[str, Any]) -> None:
+    # состояние собирается отдельно и подменяется целиком, читатели не видят пустое хранилище
+    restored = InMemoryStorage(max_expired=store.max_expired)
+    for data in snapshot["wallets"]:
+        wallet = Wallet(
+            wallet_id=data["wallet_id"],
+            owners=set(data["owners"]),
+            threshold=data["threshold"],
+            timelock_seconds=data["timelock_seconds"],
+            expiry_seconds=data["expiry_seconds"],
+            paused=data["paused"],
+        )
+        for tx in data["transactions"]:
+            wallet.transactions[tx["tx_id"]] = Transaction(
+                tx_id=tx["tx_id"],
+                creator=tx["creator"],
+                payload=tx["payload"],
+                submitted_at=tx["submitted_at"],
+                confirmations=set(tx["confirmations"]),
+                executed=tx["executed"],
+                expires_at=tx["expires_at"],
+            )
+        restored.put_wallet(wallet)
+    for wallet_id, tx_id in snapshot["expired"]:
+        restored.mark_expired(wallet_id, tx_id)
+    store.replace_with(restored)
+
+
+def apply_entry(store: InMemoryStorage, entry: Dict[str, Any]) -> None:
+    action = entry["action"]
+    data = entry["data"]
+    wallet_id = entry["wallet_id"]
+    if action == "create_wallet":
+        store.put_wallet(
+            Wallet(
+                wallet_id=wallet_id,
+                owners=set(data["owners"]),
+                threshold=data["threshold"],
+                timelock_seconds=data["timelock_seconds"],
+                expiry_seconds=data["expiry_seconds"],
+            )
+        )
+        return
+    wallet = store.get_wallet(wallet_id)
+    if action == "pause":
+        wallet.paused = True
+    elif action == "unpause":
+        wallet.paused = False
+    elif action == "replace_owner":
+        wallet.owners.discard(data["old_owner"])
+        wallet.owners.add(data["new_owner"])
+    elif action == "submit":
+        tx = Transaction(
+            tx_id=data["tx_id"],
+            creator=entry["actor"],
+            payload=data["payload"],
+            submitted_at=data["submitted_at"],
+            expires_at=data["expires_at"],
+        )
+        tx.confirmations.add(entry["actor"])
+        wallet.transactions[tx.tx_id] = tx
+    elif action == "confirm":
+        wallet.transactions[data["tx_id"]].confirmations.add(entry["actor"])
+    elif action == "execute":
+        wallet.transactions[data["tx_id"]].executed = True
+    elif action == "expire":
+        wallet.transactions.pop(data["tx_id"], None)
+        store.mark_expired(wallet_id, data["tx_id"])
+    else:
+        raise ValueError(f"unknown mutation: {action}")
+
+
+def _send(conn: socket.socket, message: Dict[str, Any]) -> None:
+    conn.sendall((json.dumps(message, default=str) + "\n").encode("utf-8"))
+
+
+class ReplicationServer:
+    def __init__(
+        self,
+        socket_path: str,
+        log: MutationLog,
+        snapshot: Callable[[], Snapshot],
+        heartbeat_seconds: float = 0.5,
+    ) -> None:
+        self.socket_path = socket_path
+        self.log = log
+        # snapshot() возвращает (epoch, lsn, состояние), согласованные с логом
+        self.snapshot = snapshot
+        self.heartbeat_seconds = heartbeat_seconds
+        self._sock: Optional[socket.socket] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self.log.start_epoch()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.socket_path)
+        self._sock.listen()
+        threading.Thread(target=self._accept_loop, name="replication-accept", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.log.enabled = False
+        if self._sock is not None:
+            self._sock.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _accept_loop(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._stream, args=(conn,), name="replication-stream", daemon=True).start()
+
+    def _stream(self, conn: socket.socket) -> None:
+        try:
+            with conn, conn.makefile("r", encoding="utf-8") as reader:
+                hello = json.loads(reader.readline())
+                next_lsn = hello["from_lsn"]
+                if hello.get("epoch") != self.log.epoch:
+                    next_lsn = self._send_snapshot(conn)
+                while not self._stopped.is_set():
+                    entries = self.log.read_from(next_lsn, self.heartbeat_seconds)
+                    if entries is None:
+                        # follower отстал дальше retention, догоняет по снимку
+                        next_lsn = self._send_snapshot(conn)
+                        continue
+                    for entry in entries:
+                        _send(conn, {"type": "entry", **entry})
+                        next_lsn = entry["lsn"] + 1
+                    # heartbeat сообщает эпоху, голову лога и время primary, по нему follower считает лаг
+                    head_lsn, ts = self.log.head()
+                    _send(conn, {"type": "heartbeat", "epoch": self.log.epoch, "lsn": head_lsn, "ts": ts})
+        except (OSError, ValueError, KeyError):
+            return
+
+    def _send_snapshot(self, conn: socket.socket) -> int:
+        epoch, lsn, state = self.snapshot()
+        _send(conn, {"type": "snapshot", "epoch": epoch, "lsn": lsn, "state": state})
+        return lsn + 1
+
+
+class ReplicationFollower:
+    def __init__(
+        self,
+        socket_path: str,
+        store: InMemoryStorage,
+        max_lag_seconds: float = 5.0,
+        reconnect_seconds: float = 1.0,
+    ) -> None:
+        self.socket_path = socket_path
+        self.store = store
+        self.max_lag_seconds = max_lag_seconds
+        self.reconnect_seconds = reconnect_seconds
+        self.applied_lsn = 0
+        self.primary_lsn = 0
+        self.epoch: Optional[str] = None
+        self._caught_up_at: Optional[float] = None
+        self._stopped = threading.Event()
+        self._conn: Optional[socket.socket] = None
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name="replication-follower", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._conn is not None:
+            self._conn.close()
+
+    def lag_seconds(self) -> Optional[float]:
+        if self._caught_up_at is None:
+            return None
+        return max(current_timestamp() - self._caught_up_at, 0.0)
+
+    def is_fresh(self) -> bool:
+        lag = self.lag_seconds()
+        return lag is not None and lag <= self.max_lag_seconds
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "epoch": self.epoch,
+            "applied_lsn": self.applied_lsn,
+            "primary_lsn": self.primary_lsn,
+            "lag_seconds": self.lag_seconds(),
+            "max_lag_seconds": self.max_lag_seconds,
+        }
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._tail()
+            except (OSError, ValueError, KeyError):
+                pass
+            self._stopped.wait(self.reconnect_seconds)
+
+    def _tail(self) -> None:
+        self._conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        with self._conn as conn, conn.makefile("r", encoding="utf-8") as reader:
+            conn.connect(self.socket_path)
+            _send(conn, {"from_lsn": self.applied_lsn + 1, "epoch": self.epoch})
+            for line in reader:
+                message = json.loads(line)
+                if message["type"] == "snapshot":
+                    self._caught_up_at = None
+                    restore_storage(self.store, message["state"])
+                    self.epoch = message["epoch"]
+                    self.applied_lsn = self.primary_lsn = message["lsn"]
+                elif message["type"] == "entry":
+                    try:
+                        apply_entry(self.store, message)
+                    except (KeyError, ValueError):
+                        # состояние разошлось с primary: сбрасываем эпоху, при переподключении придёт снимок
+                        self._resync()
+                        raise
+                    self.applied_lsn = message["lsn"]
+                    self.primary_lsn = max(self.primary_lsn, message["lsn"])
+                elif message["epoch"] != self.epoch:
+                    self._resync()
+                    return
+                else:
+                    self.primary_lsn = message["lsn"]
+                    if self.applied_lsn >= self.primary_lsn:
+                        self._caught_up_at = message["ts"]
+
+    def _resync(self) -> None:
+        self.epoch = None
+        self._caught_up_at = None
+
+
+mutation_log = MutationLog()
@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional, Tuple
+from src.app.api.errors import ERROR_TYPE_HEADER
+
+
+# статус, заголовки, тело и задержка в мс, измеренная с момента фактической отправки
+Response = Tuple[int, Dict[str, str], Any, float]
+
+# запросы, после которых состояние кошелька меняется для всех остальных запросов к нему
+EXCLUSIVE_PATHS = (
+    "/wallet/create",
+    "/wallet/pause",
+    "/wallet/unpause",
+    "/wallet/replace-owner",
+    "/tx/execute",
+)
+
+
+def load_capture(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records.sort(key=lambda r: r["t"])
+    # запросы пишутся по завершении, поэтому отсчёт может начинаться не с нуля
+    offset = records[0]["t"] if records else 0.0
+    for record in records:
+        record["t"] -= offset
+    return records
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(max(math.ceil(q / 100 * len(ordered)) - 1, 0), len(ordered) - 1)
+    return ordered[index]
+
+
+ID_KEYS = ("wallet_id", "tx_id")
+
+
+class IdRemapper:
+    def __init__(self) -> None:
+        self.ids: Dict[str, str] = {}
+
+    def remap(self, body: Any) -> Any:
+        if not isinstance(body, dict):
+            return body
+        remapped = dict(body)
+        for key in ID_KEYS:
+            if key in remapped:
+                remapped[key] = self.ids.get(remapped[key], remapped[key])
+        return remapped
+
+    def learn(self, record: Dict[str, Any], data: Any) -> None:
+        if not isinstance(data, dict):
+            return
+        for key, captured in record.get("r", {}).items():
+            if key in data:
+                self.ids[captured] = data[key]
+
+
+def required_ids(record: Dict[str, Any]) -> List[str]:
+    body = record.get("b")
+    if not isinstance(body, dict):
+        return []
+    return [body[key] for key in ID_KEYS if isinstance(body.get(key), str)]
+
+
+def produced_ids(record: Dict[str, Any]) -> List[str]:
+    # новые id создают только create/submit; /tx/get лишь повторяет id из запроса
+    required = set(required_ids(record))
+    return [value for value in record.get("r", {}).values() if value not in required]
+
+
+def wallet_key(record: Dict[str, Any]) -> Optional[str]:
+    if "wallet_id" in record.get("r", {}):
+        return record["r"]["wallet_id"]
+    body = record.get("b")
+    if isinstance(body, dict) and isinstance(body.get("wallet_id"), str):
+        return body["wallet_id"]
+    return None
+
+
+class WalletOrdering:
+    # чтения, submit и confirm идут параллельно между барьерами; create, pause, unpause,
+    # replace-owner и execute ждут всех предыдущих запросов кошелька и сами становятся барьером
+    def __init__(self) -> None:
+        self.barrier: Dict[str, asyncio.Future] = {}
+        self.shared: Dict[str, List[asyncio.Future]] = {}
+
+    def dependencies(self, record: Dict[str, Any], finished: asyncio.Future) -> List[asyncio.Future]:
+        key = wallet_key(record)
+        if key is None:
+            return []
+        barrier = [self.barrier[key]] if key in self.barrier else []
+        if record["p"] in EXCLUSIVE_PATHS:
+            after = barrier + self.shared.pop(key, [])
+            self.barrier[key] = finished
+            return after
+        self.shared.setdefault(key, []).append(finished)
+        return barrier
+
+
+class InProcessTransport:
+    def __init__(self, app: Any = None) -> None:
+        if app is None:
+            from src.app.main import create_app
+
+            app = create_app()
+        self.app = app
+        self._lifespan = AsyncExitStack()
+
+    async def start(self) -> None:
+        await self._lifespan.enter_async_context(self.app.router.lifespan_context(self.app))
+
+    async def close(self) -> None:
+        await self._lifespan.aclose()
+
+    async def request(self, method: str, path: str, body: Any) -> Response:
+        raw = json.dumps(body).encode("utf-8") if body is not None else b""
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode("ascii"),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(raw)).encode("ascii")),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("replay", 80),
+        }
+        pending = [{"type": "http.request", "body": raw, "more_body": False}]
+        done = asyncio.Event()
+        status = 500
+        headers: Dict[str, str] = {}
+        chunks: List[bytes] = []
+
+        async def receive() -> Dict[str, Any]:
+            if pending:
+                return pending.pop()
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for name, value in message.get("headers", []):
+                    headers[name.decode("latin-1").lower()] = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        sent = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            done.set()
+        latency_ms = (time.perf_counter() - sent) * 1000
+        return status, headers, _parse_json(b"".join(chunks)), latency_ms
+
+
+class HttpTransport:
+    def __init__(self, base_url: str, timeout: float = 30.0, max_workers: int = 64) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # свой пул по числу одновременных запросов: общий executor молча ограничил бы concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="replay-http")
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    async def request(self, method: str, path: str, body: Any) -> Response:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._request, method, path, body)
+
+    def _request(self, method: str, path: str, body: Any) -> Response:
+        raw = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib.request.Request(
+            self.base_url + path, data=raw, method=method, headers={"Content-Type": "application/json"}
+        )
+        sent = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                status, headers, data = resp.status, _lower_headers(resp.headers), _parse_json(resp.read())
+        except urllib.error.HTTPError as exc:
+            status, headers, data = exc.code, _lower_headers(exc.headers), _parse_json(exc.read())
+        return status, headers, data, (time.perf_counter() - sent) * 1000
+
+
+class ReplayStats:
+    def __init__(self) -> None:
+        self.latencies_ms: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.transport_errors = 0
+        self.status_mismatches = 0
+        self.duration_s = 0.0
+
+    def record(
+        self, latency_ms: float, status: int, headers: Dict[str, str], captured: Optional[int]
+    ) -> None:
+        self.latencies_ms.append(latency_ms)
+        self.statuses[str(status)] += 1
+        if captured is not None and captured != status:
+            self.status_mismatches += 1
+        if status >= 400:
+            self.errors[error_type(status, headers)] += 1
+
+    def report(self) -> Dict[str, Any]:
+        total = len(self.latencies_ms) + self.transport_errors
+        return {
+            "requests": total,
+            "duration_s": round(self.duration_s, 3),
+            "throughput_rps": round(total / self.duration_s, 2) if self.duration_s > 0 else None,
+            "latency_ms": {
+                "p50": _round(percentile(self.latencies_ms, 50)),
+                "p90": _round(percentile(self.latencies_ms, 90)),
+                "p99": _round(percentile(self.latencies_ms, 99)),
+                "max": _round(max(self.latencies_ms) if self.latencies_ms else None),
+            },
+            "statuses": dict(self.statuses),
+            "status_mismatches": self.status_mismatches,
+            "transport_errors": self.transport_errors,
+            "errors": dict(self.errors),
+        }
+
+
+def error_type(status: int, headers: Dict[str, str]) -> str:
+    name = headers.get(ERROR_TYPE_HEADER.lower())
+    if name:
+        return name
+    if status == 422:
+        return "ValidationError"
+    return f"HTTP {status}"
+
+
+async def replay(
+    records: List[Dict[str, Any]], transport: Any, speed: float = 1.0, concurrency: int = 64
+) -> ReplayStats:
+    # speed <= 0 — максимальная скорость, без пауз между запросами
+    loop = asyncio.get_running_loop()
+    stats = ReplayStats()
+    ids = IdRemapper()
+    limit = asyncio.Semaphore(concurrency)
+    producers: Dict[str, asyncio.Future] = {}
+    ordering = WalletOrdering()
+    started = loop.time()
+
+    async def run(record: Dict[str, Any], after: List[asyncio.Future], finished: asyncio.Future) -> None:
+        try:
+            if speed > 0:
+                await asyncio.sleep(max(started + record["t"] / speed - loop.time(), 0.0))
+            for dependency in after:
+                await dependency
+            async with limit:
+                try:
+                    body = ids.remap(record["b"])
+                    response = await transport.request(record["m"], record["p"], body)
+                    status, headers, data, latency_ms = response
+                except Exception as exc:
+                    stats.transport_errors += 1
+                    stats.errors[type(exc).__name__] += 1
+                    return
+                stats.record(latency_ms, status, headers, record.get("s"))
+                ids.learn(record, data)
+        finally:
+            finished.set_result(None)
+
+    tasks = []
+    for record in records:
+        finished = loop.create_future()
+        # нужные id должны быть созданы, а порядок относительно изменений кошелька сохранён
+        after = [producers[value] for value in required_ids(record) if value in producers]
+        after += ordering.dependencies(record, finished)
+        for value in produced_ids(record):
+            producers.setdefault(value, finished)
+        tasks.append(asyncio.ensure_future(run(record, after, finished)))
+    await asyncio.gather(*tasks)
+    stats.duration_s = loop.time() - started
+    return stats
+
+
+def _parse_json(raw: bytes) -> Any:
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+def _lower_headers(headers: Any) -> Dict[str, str]:
+    return {k.lower(): v for k, v in headers.items()} if headers is not None else {}
+
+
+async def _run(records: List[Dict[str, Any]], transport: Any, speed: float, concurrency: int) -> ReplayStats:
+    await transport.start()
+    try:
+        return await replay(records, transport, speed, concurrency)
+    finally:
+        await transport.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay captured multisig traffic")
+    parser.add_argument("capture", help="capture file written with MULTISIG_CAPTURE_FILE")
+    parser.add_argument("--url", help="base URL of a running service; in-process create_app() if omitted")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="time scale: 1 = as captured, N = N times faster, 0 = max"
+    )
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args(argv)
+    transport = HttpTransport(args.url, max_workers=args.concurrency) if args.url else InProcessTransport()
+    stats = asyncio.run(_run(load_capture(args.capture), transport, args.speed, args.concurrency))
+    print(json.dumps(stats.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,28 @@
-from src.app.services.wallet_service import wallet_service
+import asyncio
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+from src.app.services import wallet_service as wallet_service_module
+from src.app.services.wallet_service import wallet_service, WalletService
+from src.app.core.errors import TransactionExpiredError, InvalidOperationError, ReadOnlyReplicaError
+from src.app.core.timing_wheel import TimingWheel
+from src.app.storage.audit import AuditLog, audit_log, record_hash
+from src.app.storage.memory import InMemoryStorage, storage
+from src.app.storage.replication import (
+    MutationLog,
+    ReplicationServer,
+    ReplicationFollower,
+    apply_entry,
+    mutation_log,
+    restore_storage,
+    snapshot_storage,
+)
+from src.app.main import create_app
+from src.app.tools import replay
 
 
 def test_submit_confirm_execute():
@@ -15,3 +39,428 @@ def test_submit_confirm_execute():
     # assert
     assert result["payload"]["op"] == "noop"
 
+
+def test_expired_transaction_is_rejected_and_swept(monkeypatch):
+    start = time.time()
+    clock = {"now": start}
+    monkeypatch.setattr(wallet_service_module, "current_timestamp", lambda: clock["now"])
+    w = wallet_service.create_wallet(["a", "b"], threshold=2, timelock_seconds=0, expiry_seconds=10)
+    wallet_id = w["wallet_id"]
+    tx = wallet_service.submit_transaction(wallet_id, creator="a", payload={"op": "noop"})
+    assert tx["expires_at"] == start + 10
+
+    clock["now"] = start + 10
+    with pytest.raises(TransactionExpiredError):
+        wallet_service.confirm_transaction(wallet_id, tx["tx_id"], owner="b")
+    with pytest.raises(TransactionExpiredError):
+        wallet_service.execute_transaction(wallet_id, tx["tx_id"])
+
+    # после тика колеса любой вызов сервиса убирает транзакцию, ошибка остаётся прежней
+    clock["now"] = start + 11
+    with pytest.raises(TransactionExpiredError):
+        wallet_service.execute_transaction(wallet_id, tx["tx_id"])
+    assert tx["tx_id"] not in storage.get_wallet(wallet_id).transactions
+    with pytest.raises(TransactionExpiredError):
+        wallet_service.get_transaction(wallet_id, tx["tx_id"])
+
+
+def test_expiry_must_exceed_timelock():
+    with pytest.raises(InvalidOperationError):
+        wallet_service.create_wallet(["a"], threshold=1, timelock_seconds=100, expiry_seconds=10)
+    with pytest.raises(InvalidOperationError):
+        wallet_service.create_wallet(["a"], threshold=1, timelock_seconds=10, expiry_seconds=10)
+
+
+def test_timing_wheel_fires_after_deadline_across_rotations():
+    wheel = TimingWheel(tick_seconds=1.0, slots=4)
+    wheel.schedule(2.5, "soon", now=0.0)
+    wheel.schedule(9.0, "later", now=0.0)
+
+    assert wheel.advance(2.9) == []
+    assert wheel.advance(3.0) == ["soon"]
+    assert wheel.advance(8.9) == []
+    assert wheel.advance(100.0) == ["later"]
+    assert len(wheel) == 0
+
+
+def test_audit_log_records_service_mutations():
+    w = wallet_service.create_wallet(["a", "b"], threshold=2, timelock_seconds=0)
+    wallet_id = w["wallet_id"]
+    tx = wallet_service.submit_transaction(wallet_id, creator="a", payload={"op": "noop"})
+    wallet_service.confirm_transaction(wallet_id, tx["tx_id"], owner="b")
+    wallet_service.execute_transaction(wallet_id, tx["tx_id"])
+
+    records = wallet_service.get_audit_records(wallet_id)
+    assert [r["action"] for r in records] == ["create_wallet", "submit", "confirm", "execute"]
+    assert records[2]["actor"] == "b"
+    assert wallet_service.verify_audit_log(wallet_id, start_seq=0)
+
+    audit_log.records[wallet_id][2].actor = "mallory"
+    assert not wallet_service.verify_audit_log(wallet_id, start_seq=0)
+
+
+def test_audit_log_checkpoints_limit_verification_to_tail():
+    log = AuditLog(checkpoint_interval=4)
+    for i in range(10):
+        log.append("w", "confirm", actor="a", data={"i": i})
+    log.flush()
+    assert [(cp.start_seq, cp.end_seq) for cp in log.checkpoints["w"]] == [(0, 4), (4, 8)]
+
+    # подмена внутри закрытого чекпоинта не видна при проверке хвоста, но видна при проверке диапазона
+    log.records["w"][1].data = {"i": 100}
+    assert log.verify("w")
+    assert log.verify("w", start_seq=4)
+    assert log.verify("w", start_seq=2, end_seq=4)
+    assert not log.verify("w", start_seq=0, end_seq=4)
+    assert not log.verify("w", start_seq=1, end_seq=2)
+
+
+def test_audit_log_tail_is_anchored_to_checkpoint_head():
+    log = AuditLog(checkpoint_interval=4)
+    for i in range(6):
+        log.append("w", "confirm", actor="a", data={"i": i})
+    log.flush()
+
+    # переписанный хвост, согласованный с подменённым хешем последней записи чекпоинта
+    records = log.records["w"]
+    records[3].hash = "f" * 64
+    for record in records[4:]:
+        record.prev_hash = records[record.seq - 1].hash
+        record.hash = record_hash(record)
+    assert not log.verify("w")
+
+
+def test_follower_applies_mutations_streamed_from_primary(tmp_path):
+    socket_path = str(tmp_path / "replication.sock")
+    server = ReplicationServer(
+        socket_path, mutation_log, wallet_service.replication_snapshot, heartbeat_seconds=0.05
+    )
+    server.start()
+    replica_store = InMemoryStorage()
+    follower = ReplicationFollower(socket_path, replica_store, reconnect_seconds=0.05)
+    follower.start()
+    try:
+        w = wallet_service.create_wallet(["a", "b"], threshold=2, timelock_seconds=0)
+        wallet_id = w["wallet_id"]
+        tx = wallet_service.submit_transaction(wallet_id, creator="a", payload={"op": "noop"})
+        wallet_service.confirm_transaction(wallet_id, tx["tx_id"], owner="b")
+
+        deadline = time.time() + 5
+        while follower.applied_lsn < mutation_log.head_lsn and time.time() < deadline:
+            time.sleep(0.01)
+
+        replica_tx = replica_store.get_wallet(wallet_id).transactions[tx["tx_id"]]
+        assert replica_tx.confirmations == {"a", "b"}
+        assert follower.status()["primary_lsn"] == mutation_log.head_lsn
+    finally:
+        follower.stop()
+        server.stop()
+
+
+def test_follower_converges_under_concurrent_writes(tmp_path):
+    socket_path = str(tmp_path / "replication.sock")
+    server = ReplicationServer(
+        socket_path, mutation_log, wallet_service.replication_snapshot, heartbeat_seconds=0.05
+    )
+    server.start()
+    replica_store = InMemoryStorage()
+    follower = ReplicationFollower(socket_path, replica_store, reconnect_seconds=0.05)
+    follower.start()
+    try:
+        w = wallet_service.create_wallet(["a", "b"], threshold=2, timelock_seconds=0)
+        wallet_id = w["wallet_id"]
+
+        def submit_and_confirm():
+            for _ in range(50):
+                tx = wallet_service.submit_transaction(wallet_id, creator="a", payload={})
+                wallet_service.confirm_transaction(wallet_id, tx["tx_id"], owner="b")
+
+        workers = [threading.Thread(target=submit_and_confirm) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert _wait_for(lambda: follower.applied_lsn == mutation_log.head_lsn)
+        replica_wallet = replica_store.get_wallet(wallet_id)
+        assert len(replica_wallet.transactions) == 200
+        assert all(tx.confirmations == {"a", "b"} for tx in replica_wallet.transactions.values())
+    finally:
+        follower.stop()
+        server.stop()
+
+
+def _wait_for(condition):
+    deadline = time.time() + 5
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def _primary(socket_path, store):
+    log = MutationLog()
+    server = ReplicationServer(
+        socket_path, log, lambda: (log.epoch, log.head_lsn, snapshot_storage(store)), heartbeat_seconds=0.05
+    )
+    server.start()
+    return log, server
+
+
+def _create_wallet_entry(wallet_id):
+    data = {"owners": ["a"], "threshold": 1, "timelock_seconds": 0, "expiry_seconds": 0}
+    return {"wallet_id": wallet_id, "action": "create_wallet", "actor": None, "data": data}
+
+
+def test_follower_resyncs_from_snapshot_after_primary_restart(tmp_path):
+    socket_path = str(tmp_path / "replication.sock")
+    old_store = InMemoryStorage()
+    apply_entry(old_store, _create_wallet_entry("old"))
+    old_log, old_server = _primary(socket_path, old_store)
+    replica_store = InMemoryStorage()
+    follower = ReplicationFollower(socket_path, replica_store, reconnect_seconds=0.05)
+    follower.start()
+    try:
+        assert _wait_for(lambda: follower.epoch == old_log.epoch and follower.is_fresh())
+        assert replica_store.has_wallet("old")
+        old_server.stop()
+
+        new_store = InMemoryStorage()
+        apply_entry(new_store, _create_wallet_entry("new"))
+        new_log, new_server = _primary(socket_path, new_store)
+        try:
+            assert _wait_for(lambda: follower.epoch == new_log.epoch and follower.is_fresh())
+            assert replica_store.has_wallet("new")
+            assert not replica_store.has_wallet("old")
+        finally:
+            new_server.stop()
+    finally:
+        follower.stop()
+
+
+def test_mutation_log_retention_drops_old_entries():
+    log = MutationLog(retention=2)
+    log.start_epoch()
+    for i in range(5):
+        log.append("w", "pause", actor=None, data={})
+
+    assert log.head_lsn == 5
+    assert len(log.entries) <= 3
+    assert log.read_from(1, timeout=0) is None
+    assert [e["lsn"] for e in log.read_from(4, timeout=0)] == [4, 5]
+
+
+def test_follower_rejects_writes():
+    service = WalletService()
+    service.attach_replica(ReplicationFollower("/nonexistent.sock", InMemoryStorage()))
+    with pytest.raises(ReadOnlyReplicaError):
+        service.create_wallet(["a"], threshold=1, timelock_seconds=0)
+
+
+class _FakeTransport:
+    def __init__(self):
+        self.calls = []
+
+    async def request(self, method, path, body):
+        self.calls.append((path, body))
+        if path == "/wallet/create":
+            return 200, {}, {"wallet_id": "new-wallet"}, 1.0
+        if path == "/tx/submit":
+            return 200, {}, {"tx_id": "new-tx"}, 1.0
+        error = {"x-multisig-error": "ThresholdNotMetError"}
+        return 400, error, {"detail": "confirmations below threshold"}, 1.0
+
+
+def test_replay_remaps_ids_and_breaks_down_errors(tmp_path):
+    capture = tmp_path / "capture.jsonl"
+    records = [
+        {"m": "POST", "p": "/wallet/create", "b": {"owners": ["a"], "threshold": 1}, "s": 200, "t": 5.0,
+         "r": {"wallet_id": "old-wallet"}},
+        {"m": "POST", "p": "/tx/submit", "b": {"wallet_id": "old-wallet", "creator": "a", "payload": {}}, "s": 200,
+         "t": 5.1, "r": {"tx_id": "old-tx"}},
+        {"m": "POST", "p": "/tx/execute", "b": {"wallet_id": "old-wallet", "tx_id": "old-tx"}, "s": 400, "t": 5.2},
+    ]
+    capture.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+    transport = _FakeTransport()
+    stats = asyncio.run(replay.replay(replay.load_capture(str(capture)), transport, speed=0))
+
+    assert transport.calls[2] == ("/tx/execute", {"wallet_id": "new-wallet", "tx_id": "new-tx"})
+    report = stats.report()
+    assert report["requests"] == 3
+    assert report["errors"] == {"ThresholdNotMetError": 1}
+
+
+class _SlowTransport:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def request(self, method, path, body):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        data = {"wallet_id": "new-wallet"} if path == "/wallet/create" else {"tx_id": "new-tx"}
+        return 200, {}, data, 50.0
+
+
+def test_replay_keeps_confirmation_fan_in_concurrent():
+    records = [
+        {"m": "POST", "p": "/wallet/create", "b": {"owners": ["a", "b", "c"]}, "t": 0.0,
+         "r": {"wallet_id": "w"}},
+        {"m": "POST", "p": "/tx/submit", "b": {"wallet_id": "w", "creator": "a"}, "t": 0.0,
+         "r": {"tx_id": "x"}},
+    ] + [
+        {"m": "POST", "p": "/tx/confirm", "b": {"wallet_id": "w", "tx_id": "x", "owner": owner}, "t": 0.0}
+        for owner in ("a", "b", "c")
+    ]
+
+    transport = _SlowTransport()
+    asyncio.run(replay.replay(records, transport, speed=0))
+
+    assert transport.max_in_flight == 3
+
+
+def test_capture_and_replay_round_trip_through_create_app(tmp_path, monkeypatch):
+    capture = tmp_path / "capture.jsonl"
+    monkeypatch.setenv("MULTISIG_CAPTURE_FILE", str(capture))
+    transport = replay.InProcessTransport(create_app())
+
+    async def drive():
+        await transport.start()
+        try:
+            _, _, w, _ = await transport.request(
+                "POST", "/wallet/create", {"owners": ["a", "b"], "threshold": 1, "timelock_seconds": 100}
+            )
+            ids = {"wallet_id": w["wallet_id"]}
+            _, _, tx, _ = await transport.request("POST", "/tx/submit", {**ids, "creator": "a", "payload": {}})
+            ids["tx_id"] = tx["tx_id"]
+            await transport.request("POST", "/tx/confirm", {**ids, "owner": "b"})
+            await transport.request("POST", "/tx/execute", ids)
+            await transport.request("POST", "/owners/list", {"wallet_id": ids["wallet_id"]})
+            await transport.request("GET", "/health/", None)
+        finally:
+            await transport.close()
+
+    asyncio.run(drive())
+    records = replay.load_capture(str(capture))
+    paths = ["/wallet/create", "/tx/submit", "/tx/confirm", "/tx/execute", "/owners/list"]
+    assert [r["p"] for r in records] == paths
+    assert [r["s"] for r in records] == [200, 200, 200, 400, 200]
+
+    monkeypatch.delenv("MULTISIG_CAPTURE_FILE")
+    stats = asyncio.run(replay.replay(records, replay.InProcessTransport(), speed=0))
+    report = stats.report()
+    assert report["requests"] == 5
+    assert report["statuses"] == {"200": 4, "400": 1}
+    assert report["errors"] == {"TimelockNotElapsedError": 1}
+
+
+def test_http_transport_reports_error_type():
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            body = json.dumps({"detail": "wallet paused"}).encode("utf-8")
+            self.send_response(400)
+            self.send_header("X-Multisig-Error", "WalletPausedError")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        transport = replay.HttpTransport(f"http://127.0.0.1:{server.server_port}")
+        status, headers, data, latency_ms = asyncio.run(
+            transport.request("POST", "/tx/execute", {"wallet_id": "w"})
+        )
+        asyncio.run(transport.close())
+    finally:
+        server.shutdown()
+
+    assert status == 400
+    assert replay.error_type(status, headers) == "WalletPausedError"
+    assert data == {"detail": "wallet paused"}
+    assert latency_ms >= 0
+
+
+def test_every_service_call_sweeps_expired(monkeypatch):
+    start = time.time()
+    clock = {"now": start}
+    monkeypatch.setattr(wallet_service_module, "current_timestamp", lambda: clock["now"])
+    # отдельный сервис: колесо общего сервиса уже продвинуто фиктивными часами других тестов
+    service = WalletService()
+    w = service.create_wallet(["a", "b"], threshold=2, timelock_seconds=0, expiry_seconds=5)
+    wallet_id = w["wallet_id"]
+    tx = service.submit_transaction(wallet_id, creator="a", payload={})
+
+    clock["now"] = start + 7
+    service.pause(wallet_id)
+    assert tx["tx_id"] not in storage.get_wallet(wallet_id).transactions
+
+
+def test_audit_writer_survives_unhashable_record():
+    log = AuditLog(checkpoint_interval=4, flush_timeout=1.0)
+    log.append("w", "submit", actor="a", data={"payload": {1: "x", "k": 2}})
+    log.append("w", "confirm", actor="b", data={})
+
+    assert [r.action for r in log.get_records("w")] == ["confirm"]
+    assert log.failed_writes == 1
+    assert log.verify("w")
+
+
+def test_restore_storage_swaps_state_without_emptying_it():
+    store = InMemoryStorage()
+    apply_entry(store, _create_wallet_entry("old"))
+    readers_view = store.wallets
+    source = InMemoryStorage()
+    apply_entry(source, _create_wallet_entry("new"))
+
+    restore_storage(store, snapshot_storage(source))
+
+    assert "old" in readers_view
+    assert store.has_wallet("new") and not store.has_wallet("old")
+
+
+def test_heartbeat_reports_log_head():
+    log = MutationLog()
+    log.start_epoch()
+    log.append("w", "pause", actor=None, data={})
+    log.append("w", "unpause", actor=None, data={})
+
+    head_lsn, _ = log.head()
+    assert head_lsn == 2
+
+
+def test_replay_reproduces_captured_statuses_for_mixed_wallet_traffic(tmp_path, monkeypatch):
+    capture = tmp_path / "capture.jsonl"
+    monkeypatch.setenv("MULTISIG_CAPTURE_FILE", str(capture))
+    transport = replay.InProcessTransport(create_app())
+
+    async def drive():
+        await transport.start()
+        try:
+            _, _, w, _ = await transport.request("POST", "/wallet/create", {"owners": ["a", "b"], "threshold": 2})
+            wallet = {"wallet_id": w["wallet_id"]}
+            for _ in range(2):
+                _, _, tx, _ = await transport.request("POST", "/tx/submit", {**wallet, "creator": "a", "payload": {}})
+                ids = {**wallet, "tx_id": tx["tx_id"]}
+                await transport.request("POST", "/tx/confirm", {**ids, "owner": "b"})
+                await transport.request("POST", "/tx/execute", ids)
+                await transport.request("POST", "/wallet/pause", wallet)
+        finally:
+            await transport.close()
+
+    asyncio.run(drive())
+    records = replay.load_capture(str(capture))
+    assert [r["s"] for r in records] == [200, 200, 200, 200, 200, 200, 200, 400, 200]
+
+    monkeypatch.delenv("MULTISIG_CAPTURE_FILE")
+    for _ in range(5):
+        stats = asyncio.run(replay.replay(records, replay.InProcessTransport(), speed=0))
+        report = stats.report()
+        assert report["status_mismatches"] == 0
+        assert report["errors"] == {"WalletPausedError": 1}